@@ -21,6 +21,9 @@ class EmailAlerter:
         template_path = os.path.join(os.path.dirname(__file__), 'templates/email_template.html')
         with open(template_path, 'r', encoding='utf-8') as f:
             self.template = Template(f.read())
+        change_template_path = os.path.join(os.path.dirname(__file__), 'templates/change_template.html')
+        with open(change_template_path, 'r', encoding='utf-8') as f:
+            self.change_template = Template(f.read())
 
     def should_alert(self, domain_info: Dict[str, Any]) -> bool:
         """判断是否需要发送报警"""
@@ -55,14 +58,43 @@ class EmailAlerter:
             html_content = self.template.render(domains=domains)
             msg.attach(MIMEText(html_content, 'html'))
 
-            with smtplib.SMTP(self.smtp_config['host'], self.smtp_config['port']) as server:
-                if self.smtp_config.get('use_tls'):
-                    server.starttls()
-                server.login(self.smtp_config['username'], self.smtp_config['password'])
-                server.send_message(msg)
+            self._send(msg)
             
             console.print("[green]Email alert sent successfully![/green]")
             return True
         except Exception as e:
             console.print(f"[red]Failed to send email alert: {str(e)}[/red]")
-            return False
\ No newline at end of file
+            return False
+
+    def send_change_report(self, changes: List[Dict[str, Any]]) -> bool:
+        """发送与上次扫描相比的变更报告"""
+        changes = [c for c in changes if c['domain'] not in self.whitelist]
+        if not changes or not self.recipients or not self.config.get('change_report', True):
+            return False
+
+        changes = sorted(changes, key=lambda x: (x['change_type'], x['domain']))
+
+        try:
+            msg = MIMEMultipart('alternative')
+            msg['Subject'] = f'Domain Change Report - {datetime.now().strftime("%Y-%m-%d")}'
+            msg['From'] = self.smtp_config.get('username')
+            msg['To'] = ', '.join(self.recipients)
+
+            html_content = self.change_template.render(changes=changes)
+            msg.attach(MIMEText(html_content, 'html'))
+
+            self._send(msg)
+
+            console.print("[green]Change report sent successfully![/green]")
+            return True
+        except Exception as e:
+            console.print(f"[red]Failed to send change report: {str(e)}[/red]")
+            return False
+
+    def _send(self, msg: MIMEMultipart) -> None:
+        """通过SMTP发送邮件"""
+        with smtplib.SMTP(self.smtp_config['host'], self.smtp_config['port']) as server:
+            if self.smtp_config.get('use_tls'):
+                server.starttls()
+            server.login(self.smtp_config['username'], self.smtp_config['password'])
+            server.send_message(msg)
\ No newline at end of file
@@ -0,0 +1,4 @@
+from .index import ResultIndex
+from .server import QueryApi, serve
+
+__all__ = ['ResultIndex', 'QueryApi', 'serve']
@@ -0,0 +1,105 @@
+import bisect
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional
+
+from snapshot import SnapshotStore
+
+
+class ResultIndex:
+    """基于最新快照的内存索引，只读取本地结果，不访问注册商API"""
+
+    def __init__(self, store: SnapshotStore):
+        self.store = store
+        # (快照路径, 快照修改时间, 刷新记录修改时间)
+        self.version = None
+        self.created_at = None
+        self.records = {}
+        self.by_account = {}
+        # 按到期时间排序的 (expiry_date, domain) 列表，用于二分查找
+        self.expiry_keys = []
+        self.expiry_domains = []
+        self._lock = threading.Lock()
+
+    def reload_if_stale(self) -> None:
+        """如果有更新的快照或刷新记录则重新加载"""
+        snapshots = self.store.list_snapshots()
+        latest = snapshots[-1] if snapshots else None
+        # 快照文件名只精确到秒，同一秒内保存会覆盖原文件，因此同时比较修改时间
+        version = (latest, _mtime(latest), _mtime(self.store.overlay_path))
+        if version == self.version:
+            return
+
+        snapshot = self.store.load(latest) if latest else {'created_at': None, 'records': {}}
+        records = dict(snapshot['records'])
+        # 合并晚于该快照的按需刷新结果（只覆盖快照中已有的域名）
+        for domain, record in self.store.load_overlay().items():
+            if domain in records and record.get('refreshed_at', '') > (snapshot['created_at'] or ''):
+                records[domain] = record
+        with self._lock:
+            self.version = version
+            self.created_at = snapshot['created_at']
+            self.records = records
+            self._rebuild()
+
+    def _rebuild(self) -> None:
+        """重建账户索引和到期时间索引（调用方需持有锁）"""
+        by_account = {}
+        expiring = []
+        for domain, record in self.records.items():
+            by_account.setdefault(record.get('account_name'), []).append(domain)
+            if record.get('expiry_date'):
+                expiring.append((record['expiry_date'], domain))
+        for domains in by_account.values():
+            domains.sort()
+        expiring.sort()
+        self.by_account = by_account
+        self.expiry_keys = [expiry for expiry, _ in expiring]
+        self.expiry_domains = [domain for _, domain in expiring]
+
+    def get(self, domain: str) -> Optional[Dict[str, Any]]:
+        """按域名查询"""
+        return self.records.get(domain.lower()) or self.records.get(domain)
+
+    def accounts(self) -> List[Dict[str, Any]]:
+        """列出所有账户及其域名数量"""
+        return [
+            {'account_name': name, 'domain_count': len(domains)}
+            for name, domains in sorted(self.by_account.items(), key=lambda x: str(x[0]))
+        ]
+
+    def by_account_name(self, account_name: str) -> Optional[List[Dict[str, Any]]]:
+        """按账户查询，账户不存在时返回None"""
+        with self._lock:
+            domains = self.by_account.get(account_name)
+            if domains is None:
+                return None
+            return [self.records[domain] for domain in domains]
+
+    def expiring_within(self, days: int) -> int:
+        """N天内到期的域名数量（已过期的也包含在内），即到期时间索引中的二分查找上界"""
+        cutoff = (datetime.now() + timedelta(days=days)).isoformat()
+        with self._lock:
+            return bisect.bisect_right(self.expiry_keys, cutoff)
+
+    def expiring_slice(self, start: int, stop: int) -> List[Dict[str, Any]]:
+        """按到期时间排序取第 start 到 stop 条记录，只构建这一页"""
+        with self._lock:
+            return [self.records[domain] for domain in self.expiry_domains[start:stop]]
+
+
+def _mtime(path: Optional[str]) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns if path else None
+    except FileNotFoundError:
+        return None
+
+
+def present(record: Dict[str, Any]) -> Dict[str, Any]:
+    """将快照记录转换为API响应，days_until_expiry 按当前时间重新计算"""
+    result = dict(record)
+    if result.get('expiry_date'):
+        expiry_date = datetime.fromisoformat(result['expiry_date']).replace(tzinfo=None)
+        result['days_until_expiry'] = (expiry_date - datetime.now()).days
+    return result
@@ -0,0 +1,189 @@
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Any, Optional
+from urllib.parse import urlsplit, parse_qs, unquote
+
+from rich.console import Console
+
+from snapshot import SnapshotStore
+from .index import ResultIndex, present
+
+console = Console()
+
+
+class ApiError(Exception):
+    """带HTTP状态码的API错误"""
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class QueryApi:
+    """处理查询请求，读请求只访问本地快照"""
+
+    def __init__(self, config: Dict[str, Any], monitor=None):
+        self.config = config.get('api', {})
+        self.default_page_size = self.config.get('page_size', 100)
+        self.max_page_size = self.config.get('max_page_size', 1000)
+        self.allow_refresh = self.config.get('allow_refresh', False)
+        self.max_expiring_days = self.config.get('max_expiring_days', 3650)
+        self.index = ResultIndex(SnapshotStore(config))
+        # DomainMonitor 实例，仅用于按需刷新单个域名
+        self.monitor = monitor
+        self._refresh_lock = threading.Lock()
+
+    def handle_get(self, path: str, query: Dict[str, List[str]]) -> Dict[str, Any]:
+        """处理GET请求"""
+        self.index.reload_if_stale()
+        parts = [unquote(p) for p in path.strip('/').split('/') if p]
+
+        if parts == ['health']:
+            return {'status': 'ok', 'snapshot_created_at': self.index.created_at}
+        if len(parts) == 2 and parts[0] == 'domains':
+            record = self.index.get(parts[1])
+            if record is None:
+                raise ApiError(404, f"Domain {parts[1]} not found")
+            return present(record)
+        if parts == ['accounts']:
+            return {'items': self.index.accounts()}
+        if len(parts) == 3 and parts[0] == 'accounts' and parts[2] == 'domains':
+            records = self.index.by_account_name(parts[1])
+            if records is None:
+                raise ApiError(404, f"Account {parts[1]} not found")
+            return self._paginate(query, len(records), lambda start, stop: records[start:stop])
+        if parts == ['expiring']:
+            days = self._int_param(query, 'days', 30)
+            if not 0 <= days <= self.max_expiring_days:
+                raise ApiError(400, f"days must be between 0 and {self.max_expiring_days}")
+            end = self.index.expiring_within(days)
+            return self._paginate(query, end, lambda start, stop: self.index.expiring_slice(start, min(end, stop)))
+
+        raise ApiError(404, f"Unknown path /{'/'.join(parts)}")
+
+    def handle_post(self, path: str) -> Dict[str, Any]:
+        """处理POST请求（按需刷新单个域名）"""
+        parts = [unquote(p) for p in path.strip('/').split('/') if p]
+        if not (len(parts) == 3 and parts[0] == 'domains' and parts[2] == 'refresh'):
+            raise ApiError(404, f"Unknown path /{'/'.join(parts)}")
+        if not self.allow_refresh or self.monitor is None:
+            raise ApiError(403, "On-demand refresh is disabled")
+
+        self.index.reload_if_stale()
+        domain = parts[1]
+        existing = self.index.get(domain)
+        # 只允许刷新已在快照中的域名，避免把未监控的域名加入结果
+        if existing is None:
+            raise ApiError(404, f"Domain {domain} not found")
+        domain = existing['domain']
+        account = next((acc for acc in self.monitor.accounts if acc.name == existing.get('account_name')), None)
+
+        # 同一时间只允许一个刷新请求，避免并发消耗注册商API配额
+        with self._refresh_lock:
+            if account:
+                record = self.monitor.check_specific_domain(domain, account)
+            else:
+                record = self.monitor.check_domain_without_auth(domain)
+            if not record:
+                raise ApiError(502, f"Failed to refresh {domain}")
+
+            # 刷新结果写入单独的叠加文件，不进入扫描快照序列，下次扫描仍与上次扫描比较
+            saved = self.index.store.save_overlay_record(record, self.index.created_at)
+            self.index.reload_if_stale()
+
+        return present(saved)
+
+    def _paginate(self, query: Dict[str, List[str]], total: int,
+                  fetch: Callable[[int, int], List[Dict[str, Any]]]) -> Dict[str, Any]:
+        """分页返回记录，fetch(start, stop) 只取当前页的记录"""
+        page = self._int_param(query, 'page', 1)
+        per_page = self._int_param(query, 'per_page', self.default_page_size)
+        if page < 1 or per_page < 1:
+            raise ApiError(400, "page and per_page must be positive")
+        per_page = min(per_page, self.max_page_size)
+        start = (page - 1) * per_page
+        return {
+            'items': [present(r) for r in fetch(start, start + per_page)],
+            'page': page,
+            'per_page': per_page,
+            'total': total,
+            'snapshot_created_at': self.index.created_at,
+        }
+
+    @staticmethod
+    def _int_param(query: Dict[str, List[str]], name: str, default: int) -> int:
+        """读取整数查询参数"""
+        values = query.get(name)
+        if not values:
+            return default
+        try:
+            return int(values[0])
+        except ValueError:
+            raise ApiError(400, f"{name} must be an integer")
+
+
+def make_handler(api: QueryApi):
+    """创建绑定到指定 QueryApi 的请求处理类"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlsplit(self.path)
+            try:
+                body = api.handle_get(url.path, parse_qs(url.query))
+            except ApiError as e:
+                self._send_json(e.status, {'error': e.message})
+                return
+            self._send_json(200, body, conditional=True)
+
+        def do_POST(self):
+            url = urlsplit(self.path)
+            try:
+                body = api.handle_post(url.path)
+            except ApiError as e:
+                self._send_json(e.status, {'error': e.message})
+                return
+            self._send_json(200, body)
+
+        def _send_json(self, status: int, body: Any, conditional: bool = False):
+            payload = json.dumps(body, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            etag = '"' + hashlib.blake2b(payload, digest_size=16).hexdigest() + '"'
+            if conditional and etag in self._if_none_match():
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(payload)))
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _if_none_match(self) -> List[str]:
+            header = self.headers.get('If-None-Match', '')
+            return [tag.strip().removeprefix('W/') for tag in header.split(',') if tag.strip()]
+
+        def log_message(self, format, *args):
+            console.print(f"[dim]{self.address_string()} - {format % args}[/dim]")
+
+    return Handler
+
+
+def serve(config: Dict[str, Any], monitor=None, host: Optional[str] = None, port: Optional[int] = None) -> None:
+    """启动HTTP查询服务"""
+    api = QueryApi(config, monitor)
+    api_config = config.get('api', {})
+    host = host or api_config.get('host', '127.0.0.1')
+    port = port or api_config.get('port', 8080)
+
+    server = ThreadingHTTPServer((host, port), make_handler(api))
+    console.print(f"[cyan]Serving domain results on http://{host}:{port} (snapshots: {api.index.store.directory})[/cyan]")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        console.print("\n[yellow]Shutting down server...[/yellow]")
+    finally:
+        server.server_close()
@@ -1,5 +1,6 @@
 import os
 import json
+import argparse
 import requests
 from typing import List, Dict, Any
 import whois
@@ -12,8 +13,12 @@ from rich.panel import Panel
 from rich.progress import Progress, SpinnerColumn, BarColumn
 import time
 import socket
-from dateutil.parser import parse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from alerts import EmailAlerter
+from snapshot import SnapshotStore, diff_snapshots
+from api import serve
+from whois_parsing import WhoisParsePool
+from whois_parsing.templates import ascii_domain
 
 # Load environment variables
 load_dotenv()
@@ -107,10 +112,16 @@ class GoDaddyAccount:
 class DomainMonitor:
     def __init__(self, config_file: str = "config.json"):
         self.config_file = config_file
+        self.config = {}
         self.accounts = []
         self.domains = []
         self.godaddy_config = {}
+        self.changes = None  # Changes against the previous snapshot, None if snapshots are disabled
+        self.failed_domains = set()  # Domains that could not be checked in the current run
+        self.listed_accounts = set()  # Accounts whose domain listing succeeded in the current run
         self._load_config()
+        # Raw WHOIS responses are parsed in a process pool so parsing scales with cores
+        self.whois_parser = WhoisParsePool(self.config)
         
     def _load_config(self):
         """Load account and domain configuration from config file"""
@@ -184,6 +195,7 @@ class DomainMonitor:
             if response.status_code in [200, 203]:
                 data = response.json()
                 if isinstance(data, list):
+                    self.listed_accounts.add(account.name)
                     # 更新账户域名数量
                     account.domain_count = len(data)
                     
@@ -209,6 +221,8 @@ class DomainMonitor:
                             domain_info = self.check_specific_domain(domain_data['domain'], account)
                             if domain_info:
                                 domains.append(domain_info)
+                            else:
+                                self.failed_domains.add(domain_data['domain'])
                             progress.advance(task)
                     
                     console.print(f"\n[green]Successfully processed {len(domains)} domains![/green]")
@@ -323,15 +337,12 @@ class DomainMonitor:
         
         for attempt in range(max_retries):
             try:
-                # Use socket with a timeout for the initial connection
-                socket.setdefaulttimeout(10)
-                w = whois.whois(domain)
-                
-                # Reset timeout to default
-                socket.setdefaulttimeout(None)
+                # Fetch raw WHOIS text here; parsing is CPU-bound and runs in the parse pool
+                text = self._fetch_whois(domain)
+                w = self.whois_parser.parse(domain, text)
                 
                 # Handle case where whois query returns None or empty
-                if not w or (not hasattr(w, 'domain_name') and not hasattr(w, 'expiration_date')):
+                if not w:
                     if attempt < max_retries - 1:
                         console.print(f"[yellow]No data returned for {domain}, retrying...[/yellow]")
                         time.sleep(retry_delay)
@@ -340,93 +351,35 @@ class DomainMonitor:
                         console.print(f"[red]No WHOIS data available for {domain}[/red]")
                         return None
 
-                # Handle domain name verification
-                domain_name = None
-                if hasattr(w, 'domain_name'):
-                    if isinstance(w.domain_name, list):
-                        domain_name = next((d.lower() for d in w.domain_name if d), None)
-                    else:
-                        domain_name = w.domain_name.lower() if w.domain_name else None
+                domain_name = w['domain_name']
                 
                 # Special handling for .au domains
                 if domain.endswith('.au') and not domain_name:
                     domain_name = domain.lower()
                 
-                # Verify domain name if available
-                if domain_name and domain.lower() not in domain_name:
+                # Verify domain name if available (compared in IDNA form, registries
+                # return Unicode domains as xn-- labels)
+                if domain_name and ascii_domain(domain) not in ascii_domain(domain_name):
                     if attempt < max_retries - 1:
                         console.print(f"[yellow]Domain name mismatch for {domain}, retrying...[/yellow]")
                         time.sleep(retry_delay)
                         continue
                 
-                # Handle expiration date with multiple fallbacks
-                expiry_date = None
-                if hasattr(w, 'expiration_date'):
-                    try:
-                        if isinstance(w.expiration_date, list):
-                            valid_dates = [d for d in w.expiration_date if d is not None]
-                            if valid_dates:
-                                expiry_date = sorted(valid_dates)[0]
-                        elif isinstance(w.expiration_date, (str, datetime)):
-                            expiry_date = parse(str(w.expiration_date)) if isinstance(w.expiration_date, str) else w.expiration_date
-                    except Exception as e:
-                        console.print(f"[yellow]Error parsing expiration date for {domain}: {str(e)}[/yellow]")
-                
-                # If no expiration date found, try alternative fields
-                if not expiry_date and hasattr(w, 'registry_expiry_date'):
-                    try:
-                        expiry_date = parse(str(w.registry_expiry_date))
-                    except:
-                        pass
-                
+                expiry_date = w['expiration_date']
                 if not expiry_date:
                     console.print(f"[red]Could not determine expiration date for {domain}[/red]")
                     return None
                 
-                # Handle registrar with fallbacks
-                registrar = None
-                if hasattr(w, 'registrar'):
-                    if isinstance(w.registrar, list):
-                        registrar = next((r for r in w.registrar if r), None)
-                    else:
-                        registrar = w.registrar
-                
-                if not registrar and hasattr(w, 'registrant'):
-                    registrar = w.registrant
-                
-                registrar = registrar if registrar else 'Unknown'
-                
-                # Process creation date
-                creation_date = None
-                if hasattr(w, 'creation_date'):
-                    try:
-                        if isinstance(w.creation_date, list):
-                            valid_dates = [d for d in w.creation_date if d is not None]
-                            if valid_dates:
-                                creation_date = sorted(valid_dates)[0]
-                        elif isinstance(w.creation_date, (str, datetime)):
-                            creation_date = parse(str(w.creation_date)) if isinstance(w.creation_date, str) else w.creation_date
-                    except:
-                        pass
-                
-                # Get nameservers with better error handling
-                nameservers = []
-                if hasattr(w, 'name_servers') and w.name_servers:
-                    if isinstance(w.name_servers, list):
-                        nameservers = [ns.lower() for ns in w.name_servers if ns and isinstance(ns, str)]
-                    elif isinstance(w.name_servers, str):
-                        nameservers = [w.name_servers.lower()]
-                
                 return {
                     'domain': domain,
                     'account_name': 'Manual',
                     'expiry_date': expiry_date,
-                    'days_until_expiry': (expiry_date - datetime.now()).days if expiry_date else None,
-                    'registrar': registrar,
+                    'days_until_expiry': (expiry_date - datetime.now()).days,
+                    'registrar': w['registrar'] or 'Unknown',
                     'status': 'ACTIVE',
                     'status_display': '✅ Active',
-                    'created_at': creation_date,
-                    'nameServers': nameservers,
+                    'created_at': w['creation_date'],
+                    'nameServers': w['name_servers'],
                     'privacy': None
                 }
                     
@@ -455,9 +408,15 @@ class DomainMonitor:
         
         return None
 
+    def _fetch_whois(self, domain: str) -> str:
+        """Fetch raw WHOIS text (NICClient applies a 10-second socket timeout)"""
+        return whois.NICClient().whois_lookup(None, whois.extract_domain(domain).encode('idna'), 0)
+
     def check_domains(self) -> List[Dict]:
         """Check all domains"""
         results = []
+        self.failed_domains = set()
+        self.listed_accounts = set()
         
         # 1. Get all domains under the default account (SK)
         default_account = next((acc for acc in self.accounts if acc.name == "SK"), None)
@@ -471,25 +430,92 @@ class DomainMonitor:
         domains_to_check = configured_domains - existing_domains
         
         if domains_to_check:
-            with Progress() as progress:
+            fetch_workers = self.config.get('whois', {}).get('fetch_workers', 8)
+            with Progress() as progress, ThreadPoolExecutor(max_workers=fetch_workers) as executor:
                 task = progress.add_task("[cyan]Checking other domains...", total=len(domains_to_check))
-                for domain in domains_to_check:
-                    domain_info = self.check_domain_without_auth(domain)
+                futures = {executor.submit(self.check_domain_without_auth, domain): domain for domain in domains_to_check}
+                for future in as_completed(futures):
+                    domain_info = future.result()
                     
                     if domain_info:
                         results.append(domain_info)
+                    else:
+                        self.failed_domains.add(futures[future])
                     
                     progress.advance(task)
+            self.whois_parser.close()
+        
+        # Compare with the previous snapshot
+        previous = self.record_snapshot(results)
         
         # Send email alert
         alerter = EmailAlerter(self.config)
         expiring_domains = [d for d in results if alerter.should_alert(d)]
+        if self.changes is not None and self.changes_only():
+            # Critical domains are always alerted; others only when they changed
+            # (crossing a 30/60/90-day threshold counts as a change)
+            changed_domains = {c['domain'] for c in self.changes}
+            expiring_domains = [d for d in expiring_domains
+                                if d['domain'] in changed_domains or d['days_until_expiry'] <= 30]
         if expiring_domains:
             console.print(f"\nFound {len(expiring_domains)} domains that need attention, sending email alert...")
             alerter.send_alert(expiring_domains)
         
+        # Only report changes once a baseline snapshot exists
+        if previous is not None and self.changes:
+            alerter.send_change_report(self.changes)
+        
         return results
 
+    def changes_only(self) -> bool:
+        """Whether output and alerts should be limited to changed records"""
+        return self.config.get('snapshot', {}).get('changes_only', False)
+
+    def record_snapshot(self, results: List[Dict]) -> Dict:
+        """Save a snapshot of this run and diff it against the previous one
+        
+        Returns the previous snapshot, or None if there was none.
+        """
+        store = SnapshotStore(self.config)
+        if not store.enabled:
+            return None
+        
+        try:
+            previous = store.load_latest()
+            previous_records = previous['records'] if previous else {}
+            carried = self._carry_over_records(previous_records, results)
+            current = store.save(results, carried)
+        except Exception as e:
+            console.print(f"[red]Error saving snapshot: {str(e)}[/red]")
+            return None
+        
+        if carried:
+            console.print(f"[yellow]{len(carried)} domains could not be checked, keeping their previous records.[/yellow]")
+        self.changes = diff_snapshots(previous_records, current['records'])
+        if previous is None:
+            console.print(f"[cyan]Saved baseline snapshot with {len(current['records'])} domains.[/cyan]")
+        else:
+            console.print(f"[cyan]{len(self.changes)} domains changed since the snapshot taken at {previous['created_at']}.[/cyan]")
+        return previous
+
+    def _carry_over_records(self, previous_records: Dict[str, Dict], results: List[Dict]) -> Dict[str, Dict]:
+        """Previous records of domains missing from this run because fetching failed
+        
+        A domain only counts as removed when it was checked successfully before and
+        is no longer listed by its account (or no longer configured).
+        """
+        checked = {r['domain'] for r in results}
+        godaddy_accounts = {acc.name for acc in self.accounts}
+        carried = {}
+        for domain, record in previous_records.items():
+            if domain in checked:
+                continue
+            account_name = record.get('account_name')
+            listing_failed = account_name in godaddy_accounts and account_name not in self.listed_accounts
+            if domain in self.failed_domains or listing_failed:
+                carried[domain] = record
+        return carried
+
 def display_results(results: List[Dict[str, Any]]):
     """Display domain check results"""
     if not results:
@@ -577,6 +603,52 @@ def display_results(results: List[Dict[str, Any]]):
     
     console.print(Panel(legend, title="Legend", border_style="cyan"))
 
+def display_changes(changes: List[Dict[str, Any]]):
+    """Display changes against the previous snapshot"""
+    if not changes:
+        console.print("[green]No changes since the previous scan.[/green]")
+        return
+
+    table = Table(
+        show_header=True,
+        header_style="bold cyan",
+        border_style="cyan",
+        title="Changes Since Previous Scan",
+        caption="Last Updated: " + datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    )
+    
+    table.add_column("Change", justify="center", no_wrap=True)
+    table.add_column("Account", justify="left", style="cyan")
+    table.add_column("Domain", justify="left", style="white")
+    table.add_column("Expiry Date", justify="center", style="cyan")
+    table.add_column("Details", justify="left")
+
+    change_styles = {
+        'added': "[green]+ Added[/green]",
+        'changed': "[yellow]~ Changed[/yellow]",
+        'removed': "[red]- Removed[/red]"
+    }
+
+    for change in sorted(changes, key=lambda x: (x['change_type'], x['domain'])):
+        record = change['record']
+        details = []
+        for field in change['fields']:
+            old_value = ", ".join(field['old']) if isinstance(field['old'], list) else field['old']
+            new_value = ", ".join(field['new']) if isinstance(field['new'], list) else field['new']
+            details.append(f"{field['field']}: {old_value} → {new_value}")
+        
+        table.add_row(
+            change_styles.get(change['change_type'], change['change_type']),
+            record.get('account_name', 'N/A'),
+            change['domain'],
+            (record.get('expiry_date') or 'N/A')[:10],
+            "\n".join(details) if details else "-"
+        )
+
+    console.print()
+    console.print(table)
+    console.print()
+
 def format_date(date):
     """Format date display"""
     return date.strftime('%Y-%m-%d %H:%M:%S')
@@ -592,6 +664,13 @@ def get_expiry_style(days):
 
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description="Domain expiration monitor")
+    parser.add_argument('mode', nargs='?', default='check', choices=['check', 'serve'],
+                        help="'check' scans all domains, 'serve' answers HTTP queries from saved snapshots")
+    parser.add_argument('--host', help="Host to bind in serve mode")
+    parser.add_argument('--port', type=int, help="Port to bind in serve mode")
+    args = parser.parse_args()
+    
     # Load configuration
     config_file = "config.json"
     if os.path.exists(config_file):
@@ -600,13 +679,26 @@ def main():
     else:
         config = {}
     
+    if args.mode == 'serve':
+        # Only build a monitor (and its registrar clients) when on-demand refresh is enabled
+        monitor = DomainMonitor(config_file) if config.get('api', {}).get('allow_refresh', False) else None
+        serve(config, monitor, args.host, args.port)
+        return
+    
     # Initialize domain monitor
-    monitor = DomainMonitor()
+    monitor = DomainMonitor(config_file)
     
     # Check all domains
     results = monitor.check_domains()
     
-    display_results(results)
+    if monitor.changes is not None and monitor.changes_only():
+        changed_domains = {c['domain'] for c in monitor.changes if c['change_type'] != 'removed'}
+        changed_results = [r for r in results if r['domain'] in changed_domains]
+        if changed_results:
+            display_results(changed_results)
+        display_changes(monitor.changes)
+    else:
+        display_results(results)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
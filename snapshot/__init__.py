@@ -0,0 +1,4 @@
+from .store import SnapshotStore
+from .diff import diff_snapshots
+
+__all__ = ['SnapshotStore', 'diff_snapshots']
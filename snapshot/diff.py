@@ -0,0 +1,41 @@
+from typing import Dict, List, Any
+
+from .store import FINGERPRINT_FIELDS
+
+ADDED = 'added'
+CHANGED = 'changed'
+REMOVED = 'removed'
+
+
+def _changed_fields(previous: Dict[str, Any], current: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """列出两条记录之间发生变化的字段"""
+    return [
+        {'field': field, 'old': previous.get(field), 'new': current.get(field)}
+        for field in FINGERPRINT_FIELDS
+        if previous.get(field) != current.get(field)
+    ]
+
+
+def diff_snapshots(previous: Dict[str, Dict[str, Any]],
+                   current: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """按域名比较两次快照的记录
+
+    只比较指纹，指纹不同的记录才会逐字段比较，因此耗时与变化数量而非域名总数相关。
+    """
+    changes = []
+    for domain, record in current.items():
+        old = previous.get(domain)
+        if old is None:
+            changes.append({'domain': domain, 'change_type': ADDED, 'record': record, 'fields': []})
+        elif old.get('fingerprint') != record['fingerprint']:
+            changes.append({
+                'domain': domain,
+                'change_type': CHANGED,
+                'record': record,
+                'fields': _changed_fields(old, record),
+            })
+
+    for domain in previous.keys() - current.keys():
+        changes.append({'domain': domain, 'change_type': REMOVED, 'record': previous[domain], 'fields': []})
+
+    return changes
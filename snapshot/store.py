@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+# 参与指纹计算的字段（days_until_expiry 每天都会变化，不参与比较，
+# 改为比较其所在的到期区间 expiry_bucket，跨越 30/60/90 天阈值时视为变化）
+FINGERPRINT_FIELDS = (
+    'account_name',
+    'expiry_date',
+    'expiry_bucket',
+    'registrar',
+    'status',
+    'created_at',
+    'nameServers',
+    'privacy',
+)
+
+SNAPSHOT_SUFFIX = '.json'
+# 按需刷新的结果单独保存，不属于扫描快照序列（不参与 load_latest、diff 和 keep 清理）
+OVERLAY_NAME = 'refreshes.overlay'
+TIMESTAMP_FORMAT = '%Y%m%dT%H%M%S'
+
+
+def expiry_bucket(days: Optional[int]) -> Optional[str]:
+    """按 30/60/90 天阈值划分到期区间"""
+    if days is None:
+        return None
+    if days <= 30:
+        return 'critical'
+    elif days <= 60:
+        return 'warning'
+    elif days <= 90:
+        return 'notice'
+    return 'normal'
+
+
+def normalize_value(field: str, value: Any) -> Any:
+    """将字段值转换为可序列化、可比较的形式"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if field == 'nameServers':
+        return sorted(ns.lower() for ns in (value or []) if ns)
+    return value
+
+
+def serialize_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """将域名检查结果转换为可写入快照的记录"""
+    serialized = {key: normalize_value(key, value) for key, value in record.items()}
+    serialized['expiry_bucket'] = expiry_bucket(record.get('days_until_expiry'))
+    serialized['fingerprint'] = fingerprint(serialized)
+    return serialized
+
+
+def fingerprint(record: Dict[str, Any]) -> str:
+    """计算记录指纹，用于快速判断记录是否发生变化
+
+    record 需为 serialize_record 规范化后的字段值。
+    """
+    # 规范化后的值只包含字符串、列表、布尔值和None，repr 结果稳定且比 json.dumps 更快
+    payload = tuple(record.get(field) for field in FINGERPRINT_FIELDS)
+    encoded = repr(payload).encode('utf-8')
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+class SnapshotStore:
+    """按运行保存域名检查结果的快照目录"""
+
+    def __init__(self, config: Dict[str, Any]):
+        self.config = config.get('snapshot', {})
+        self.enabled = self.config.get('enabled', True)
+        self.directory = self.config.get('directory', 'data/snapshots')
+        self.keep = self.config.get('keep', 30)
+        self.overlay_path = os.path.join(self.directory, OVERLAY_NAME)
+
+    def list_snapshots(self) -> List[str]:
+        """返回按时间排序的快照文件路径（旧的在前）"""
+        if not os.path.isdir(self.directory):
+            return []
+        names = sorted(
+            name for name in os.listdir(self.directory)
+            if name.endswith(SNAPSHOT_SUFFIX)
+        )
+        return [os.path.join(self.directory, name) for name in names]
+
+    def load(self, path: str) -> Dict[str, Any]:
+        """读取指定快照"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def load_latest(self) -> Optional[Dict[str, Any]]:
+        """读取最近一次快照，不存在时返回None"""
+        snapshots = self.list_snapshots()
+        if not snapshots:
+            return None
+        return self.load(snapshots[-1])
+
+    def save(self, results: List[Dict[str, Any]],
+             carried: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """保存本次运行结果并返回快照内容
+
+        carried 为本次未能检查成功、需要沿用上次快照的记录（已序列化）。
+        """
+        created_at = datetime.now()
+        records = dict(carried or {})
+        records.update((record['domain'], serialize_record(record)) for record in results)
+        snapshot = {
+            'created_at': created_at.isoformat(),
+            'records': records,
+        }
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, created_at.strftime(TIMESTAMP_FORMAT) + SNAPSHOT_SUFFIX)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            # json.dumps 走C加速路径，比 json.dump 逐块写入快得多
+            f.write(json.dumps(snapshot, ensure_ascii=False, separators=(',', ':')))
+        os.replace(tmp_path, path)
+
+        self._prune()
+        return snapshot
+
+    def load_overlay(self) -> Dict[str, Dict[str, Any]]:
+        """读取按需刷新的记录，不存在时返回空字典"""
+        if not os.path.exists(self.overlay_path):
+            return {}
+        with open(self.overlay_path, 'r', encoding='utf-8') as f:
+            return json.load(f)['records']
+
+    def save_overlay_record(self, record: Dict[str, Any],
+                            snapshot_created_at: Optional[str] = None) -> Dict[str, Any]:
+        """保存单个域名的按需刷新结果并返回序列化后的记录
+
+        早于最新扫描快照（snapshot_created_at）的刷新记录已被扫描结果取代，保存时一并清理。
+        """
+        records = {
+            domain: r for domain, r in self.load_overlay().items()
+            if r.get('refreshed_at', '') > (snapshot_created_at or '')
+        }
+        serialized = serialize_record(record)
+        serialized['refreshed_at'] = datetime.now().isoformat()
+        records[serialized['domain']] = serialized
+
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self.overlay_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'records': records}, ensure_ascii=False, separators=(',', ':')))
+        os.replace(tmp_path, self.overlay_path)
+        return serialized
+
+    def _prune(self) -> None:
+        """只保留最近 keep 份快照"""
+        if not self.keep or self.keep <= 0:
+            return
+        for path in self.list_snapshots()[:-self.keep]:
+            os.remove(path)
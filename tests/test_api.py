@@ -0,0 +1,202 @@
+import json
+import os
+import threading
+import urllib.error
+import urllib.request
+from datetime import datetime, timedelta
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from api.server import ApiError, QueryApi, make_handler
+
+
+def make_record(domain, days, account_name='acc'):
+    return {
+        'domain': domain,
+        'account_name': account_name,
+        'expiry_date': datetime.now() + timedelta(days=days, hours=1),
+        'days_until_expiry': days,
+        'status': 'ACTIVE',
+    }
+
+
+class StubAccount:
+    def __init__(self, name):
+        self.name = name
+
+
+class StubMonitor:
+    """只返回预设结果的 DomainMonitor 替身，不访问网络"""
+
+    def __init__(self, days=400):
+        self.accounts = [StubAccount('acc')]
+        self.days = days
+        self.calls = []
+
+    def check_specific_domain(self, domain, account):
+        self.calls.append((domain, account.name))
+        return make_record(domain, self.days)
+
+    def check_domain_without_auth(self, domain):
+        self.calls.append((domain, None))
+        return make_record(domain, self.days, account_name=None)
+
+
+@pytest.fixture
+def make_api(tmp_path):
+    def factory(records=(), monitor=None, **api_config):
+        config = {'snapshot': {'directory': str(tmp_path), 'keep': 3}, 'api': api_config}
+        api = QueryApi(config, monitor)
+        if records:
+            api.index.store.save(list(records))
+        return api
+    return factory
+
+
+@pytest.fixture
+def server(make_api):
+    servers = []
+
+    def factory(api):
+        httpd = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(api))
+        httpd.RequestHandlerClass.log_message = lambda *args: None
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        servers.append(httpd)
+        return f"http://127.0.0.1:{httpd.server_address[1]}"
+
+    yield factory
+    for httpd in servers:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def request(url, method='GET', headers=None):
+    req = urllib.request.Request(url, method=method, headers=headers or {})
+    try:
+        with urllib.request.urlopen(req) as resp:
+            return resp.status, dict(resp.headers), resp.read()
+    except urllib.error.HTTPError as e:
+        return e.code, dict(e.headers), e.read()
+
+
+def test_pagination_bounds(make_api):
+    api = make_api([make_record(f'd{i:02d}.com', i) for i in range(25)], page_size=10, max_page_size=20)
+
+    first = api.handle_get('/accounts/acc/domains', {})
+    assert first['total'] == 25
+    assert first['per_page'] == 10
+    assert [r['domain'] for r in first['items']] == [f'd{i:02d}.com' for i in range(10)]
+
+    last = api.handle_get('/accounts/acc/domains', {'page': ['3']})
+    assert [r['domain'] for r in last['items']] == [f'd{i:02d}.com' for i in range(20, 25)]
+    assert api.handle_get('/accounts/acc/domains', {'page': ['4']})['items'] == []
+
+    capped = api.handle_get('/accounts/acc/domains', {'per_page': ['500']})
+    assert capped['per_page'] == 20
+    assert len(capped['items']) == 20
+
+
+@pytest.mark.parametrize('query', [
+    {'page': ['0']},
+    {'page': ['-1']},
+    {'per_page': ['0']},
+    {'page': ['abc']},
+    {'per_page': ['1.5']},
+])
+def test_bad_pagination_params_return_400(make_api, query):
+    api = make_api([make_record('a.com', 10)])
+    with pytest.raises(ApiError) as e:
+        api.handle_get('/accounts/acc/domains', query)
+    assert e.value.status == 400
+
+
+def test_expiring_cutoff(make_api):
+    # 到期时间比 days 多一小时，d30 在 days=30 时不包含、days=31 时包含
+    api = make_api([make_record(f'd{i}.com', i) for i in (-5, 0, 10, 30, 31, 90)]
+                   + [dict(make_record('unknown.com', 0), expiry_date=None)])
+
+    result = api.handle_get('/expiring', {})
+    assert [r['domain'] for r in result['items']] == ['d-5.com', 'd0.com', 'd10.com']
+    assert result['total'] == 3
+
+    result = api.handle_get('/expiring', {'days': ['31'], 'per_page': ['2'], 'page': ['2']})
+    assert result['total'] == 4
+    assert [r['domain'] for r in result['items']] == ['d10.com', 'd30.com']
+    assert api.handle_get('/expiring', {'days': ['0']})['total'] == 1
+
+
+@pytest.mark.parametrize('days', ['-1', '3651', 'soon'])
+def test_expiring_days_out_of_range_returns_400(make_api, days):
+    api = make_api([make_record('a.com', 10)])
+    with pytest.raises(ApiError) as e:
+        api.handle_get('/expiring', {'days': [days]})
+    assert e.value.status == 400
+
+
+def test_etag_not_modified_until_snapshot_changes(make_api, server):
+    api = make_api([make_record('a.com', 10)])
+    base = server(api)
+
+    status, headers, body = request(base + '/domains/a.com')
+    assert status == 200
+    etag = headers['ETag']
+    assert json.loads(body)['domain'] == 'a.com'
+
+    status, headers, body = request(base + '/domains/a.com', headers={'If-None-Match': etag})
+    assert status == 304
+    assert body == b''
+    assert request(base + '/domains/a.com', headers={'If-None-Match': 'W/' + etag})[0] == 304
+
+    # 同一秒内覆盖快照文件也应被识别
+    api.index.store.save([make_record('a.com', 200)])
+    status, headers, body = request(base + '/domains/a.com', headers={'If-None-Match': etag})
+    assert status == 200
+    assert headers['ETag'] != etag
+    assert json.loads(body)['days_until_expiry'] == 200
+
+
+def test_refresh_disabled_returns_403(make_api, server):
+    base = server(make_api([make_record('a.com', 10)], monitor=StubMonitor()))
+    assert request(base + '/domains/a.com/refresh', method='POST')[0] == 403
+
+    base = server(make_api(allow_refresh=True))
+    assert request(base + '/domains/a.com/refresh', method='POST')[0] == 403
+
+
+def test_refresh_unknown_domain_returns_404(make_api, server):
+    monitor = StubMonitor()
+    base = server(make_api([make_record('a.com', 10)], monitor=monitor, allow_refresh=True))
+    status, _, body = request(base + '/domains/other.com/refresh', method='POST')
+    assert status == 404
+    assert 'other.com' in json.loads(body)['error']
+    assert monitor.calls == []
+
+
+def test_refresh_is_persisted_outside_scan_snapshots(make_api, tmp_path):
+    monitor = StubMonitor(days=400)
+    api = make_api([make_record('a.com', 10), make_record('b.com', 20)], monitor=monitor, allow_refresh=True)
+    snapshots = api.index.store.list_snapshots()
+
+    for _ in range(4):
+        result = api.handle_post('/domains/a.com/refresh')
+    assert result['days_until_expiry'] == 400
+    assert monitor.calls[0] == ('a.com', 'acc')
+
+    # 刷新不产生新快照，keep=3 时扫描快照也不会被清理
+    assert api.index.store.list_snapshots() == snapshots
+    assert os.path.exists(tmp_path / 'refreshes.overlay')
+
+    # 新的 QueryApi（如服务重启）从磁盘读到刷新结果
+    reloaded = make_api()
+    assert reloaded.handle_get('/domains/a.com', {})['days_until_expiry'] == 400
+    assert reloaded.handle_get('/domains/b.com', {})['days_until_expiry'] == 20
+    assert [r['domain'] for r in reloaded.handle_get('/expiring', {})['items']] == ['b.com']
+
+
+def test_newer_scan_supersedes_refresh(make_api):
+    api = make_api([make_record('a.com', 10)], monitor=StubMonitor(days=400), allow_refresh=True)
+    api.handle_post('/domains/a.com/refresh')
+
+    api.index.store.save([make_record('a.com', 15)])
+    assert api.handle_get('/domains/a.com', {})['days_until_expiry'] == 15
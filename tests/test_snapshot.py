@@ -0,0 +1,200 @@
+import json
+from datetime import datetime
+
+import pytest
+
+import app
+from snapshot import SnapshotStore, diff_snapshots
+from snapshot.store import expiry_bucket, serialize_record
+
+
+def make_record(domain, days, account_name='SK', **fields):
+    record = {
+        'domain': domain,
+        'account_name': account_name,
+        # 到期日期固定，days_until_expiry 随检查日期变化
+        'expiry_date': datetime(2030, 1, 1),
+        'days_until_expiry': days,
+        'registrar': 'GoDaddy',
+        'status': 'ACTIVE',
+        'nameServers': ['ns1.example.net', 'ns2.example.net'],
+    }
+    record.update(fields)
+    return record
+
+
+def serialized(*records):
+    return {record['domain']: serialize_record(record) for record in records}
+
+
+def test_diff_reports_added_changed_and_removed():
+    previous = serialized(make_record('kept.com', 200), make_record('renewed.com', 200),
+                          make_record('gone.com', 200))
+    current = serialized(make_record('kept.com', 200), make_record('renewed.com', 200, registrar='Namecheap'),
+                         make_record('new.com', 200))
+
+    changes = {c['domain']: c for c in diff_snapshots(previous, current)}
+    assert set(changes) == {'renewed.com', 'gone.com', 'new.com'}
+
+    assert changes['new.com']['change_type'] == 'added'
+    assert changes['new.com']['record'] == current['new.com']
+    assert changes['gone.com']['change_type'] == 'removed'
+    assert changes['gone.com']['record'] == previous['gone.com']
+    assert changes['renewed.com']['change_type'] == 'changed'
+    assert changes['renewed.com']['fields'] == [{'field': 'registrar', 'old': 'GoDaddy', 'new': 'Namecheap'}]
+
+
+def test_diff_lists_every_changed_field():
+    previous = serialized(make_record('a.com', 200))
+    current = serialized(make_record('a.com', 565, expiry_date=datetime(2031, 1, 1), status='PENDING_TRANSFER'))
+
+    [change] = diff_snapshots(previous, current)
+    assert change['fields'] == [
+        {'field': 'expiry_date', 'old': '2030-01-01T00:00:00', 'new': '2031-01-01T00:00:00'},
+        {'field': 'status', 'old': 'ACTIVE', 'new': 'PENDING_TRANSFER'},
+    ]
+
+
+def test_fingerprint_ignores_nameserver_order_and_case():
+    original = serialize_record(make_record('a.com', 200, nameServers=['ns1.example.net', 'ns2.example.net']))
+    reordered = serialize_record(make_record('a.com', 200, nameServers=['NS2.Example.NET', 'ns1.example.net']))
+    assert reordered['fingerprint'] == original['fingerprint']
+    assert diff_snapshots({'a.com': original}, {'a.com': reordered}) == []
+
+    replaced = serialize_record(make_record('a.com', 200, nameServers=['ns1.other.net', 'ns2.example.net']))
+    assert replaced['fingerprint'] != original['fingerprint']
+
+
+def test_days_until_expiry_alone_is_not_a_change():
+    previous = serialized(make_record('a.com', 45))
+    current = serialized(make_record('a.com', 44))
+    assert diff_snapshots(previous, current) == []
+
+
+@pytest.mark.parametrize('old_days, new_days, old_bucket, new_bucket', [
+    (31, 30, 'warning', 'critical'),
+    (61, 60, 'notice', 'warning'),
+    (91, 90, 'normal', 'notice'),
+])
+def test_crossing_threshold_changes_bucket(old_days, new_days, old_bucket, new_bucket):
+    assert expiry_bucket(old_days) == old_bucket
+    assert expiry_bucket(new_days) == new_bucket
+    previous = serialized(make_record('a.com', old_days))
+    current = serialized(make_record('a.com', new_days))
+
+    [change] = diff_snapshots(previous, current)
+    assert change['change_type'] == 'changed'
+    assert change['fields'] == [{'field': 'expiry_bucket', 'old': old_bucket, 'new': new_bucket}]
+
+
+def test_store_keeps_latest_snapshots(tmp_path):
+    store = SnapshotStore({'snapshot': {'directory': str(tmp_path), 'keep': 2}})
+    assert store.load_latest() is None
+    for name in ('20240101T000000', '20240102T000000', '20240103T000000'):
+        (tmp_path / (name + '.json')).write_text(json.dumps({'created_at': name, 'records': {}}))
+
+    saved = store.save([make_record('a.com', 200)])
+    assert len(store.list_snapshots()) == 2
+    assert store.load_latest() == saved
+    assert saved['records']['a.com']['expiry_bucket'] == 'normal'
+
+
+@pytest.fixture
+def monitor(tmp_path, monkeypatch):
+    config = {
+        'accounts': [
+            {'name': 'SK', 'api_key': 'key', 'api_secret': 'secret'},
+            {'name': 'Other', 'api_key': 'key', 'api_secret': 'secret'},
+        ],
+        'domains': ['whois-ok.com', 'whois-flaky.com'],
+        'snapshot': {'directory': str(tmp_path / 'snapshots')},
+        'email_alert': {'alert_threshold': 60},
+        'whois': {'parse_cache_file': str(tmp_path / 'whois_parse_cache.json')},
+    }
+    config_file = tmp_path / 'config.json'
+    config_file.write_text(json.dumps(config))
+    monitor = app.DomainMonitor(str(config_file))
+
+    # 不访问网络：GoDaddy 列表、WHOIS 查询和邮件发送都替换为本地结果
+    monitor.sk_domains = []
+    monitor.sk_listing_ok = True
+    monitor.whois_results = {}
+    monitor.alerts = []
+    monitor.change_reports = []
+
+    def get_all_domains(account):
+        if not monitor.sk_listing_ok:
+            return []
+        monitor.listed_accounts.add(account.name)
+        return list(monitor.sk_domains)
+
+    monkeypatch.setattr(monitor, '_get_all_domains', get_all_domains)
+    monkeypatch.setattr(monitor, 'check_domain_without_auth', lambda domain: monitor.whois_results.get(domain))
+    monkeypatch.setattr(app.EmailAlerter, 'send_alert', lambda self, domains: monitor.alerts.append(domains))
+    monkeypatch.setattr(app.EmailAlerter, 'send_change_report',
+                        lambda self, changes: monitor.change_reports.append(changes))
+    return monitor
+
+
+def test_failed_whois_domain_is_carried_over(monitor):
+    monitor.whois_results = {
+        'whois-ok.com': make_record('whois-ok.com', 200, account_name=None),
+        'whois-flaky.com': make_record('whois-flaky.com', 200, account_name=None),
+    }
+    monitor.check_domains()
+
+    del monitor.whois_results['whois-flaky.com']
+    monitor.check_domains()
+
+    assert monitor.failed_domains == {'whois-flaky.com'}
+    assert monitor.changes == []
+    assert 'whois-flaky.com' in SnapshotStore(monitor.config).load_latest()['records']
+
+
+def test_failed_account_listing_is_carried_over(monitor):
+    monitor.sk_domains = [make_record('sk-one.com', 200), make_record('sk-two.com', 200)]
+    monitor.check_domains()
+
+    monitor.sk_listing_ok = False
+    monitor.check_domains()
+    assert monitor.changes == []
+    assert {'sk-one.com', 'sk-two.com'} <= SnapshotStore(monitor.config).load_latest()['records'].keys()
+
+    # 列表成功后不再出现的域名才算删除
+    monitor.sk_listing_ok = True
+    monitor.sk_domains = [make_record('sk-one.com', 200)]
+    monitor.check_domains()
+    assert [(c['domain'], c['change_type']) for c in monitor.changes] == [('sk-two.com', 'removed')]
+    assert [(c['domain'], c['change_type']) for c in monitor.change_reports[-1]] == [('sk-two.com', 'removed')]
+
+
+def test_changes_only_alerts_changed_and_critical_domains(monitor):
+    monitor.config['snapshot']['changes_only'] = True
+    monitor.sk_domains = [
+        make_record('critical.com', 20),
+        make_record('warning.com', 50),
+        make_record('crossing.com', 61),
+        make_record('normal.com', 200),
+    ]
+    monitor.check_domains()
+    assert monitor.change_reports == []  # 首次运行只保存基线
+    assert {d['domain'] for d in monitor.alerts[-1]} == {'critical.com', 'warning.com'}
+
+    # 第二次运行：critical 未变化仍报警，warning 未变化不再报警，crossing 跨过 60 天阈值后报警
+    monitor.sk_domains = [
+        make_record('critical.com', 19),
+        make_record('warning.com', 49),
+        make_record('crossing.com', 60),
+        make_record('normal.com', 199),
+    ]
+    monitor.check_domains()
+    assert [c['domain'] for c in monitor.changes] == ['crossing.com']
+    assert {d['domain'] for d in monitor.alerts[-1]} == {'critical.com', 'crossing.com'}
+
+
+def test_without_changes_only_all_expiring_domains_alert(monitor):
+    monitor.sk_domains = [make_record('critical.com', 20), make_record('warning.com', 50)]
+    monitor.check_domains()
+    monitor.check_domains()
+    assert monitor.changes == []
+    assert {d['domain'] for d in monitor.alerts[-1]} == {'critical.com', 'warning.com'}
@@ -0,0 +1,175 @@
+import os
+from datetime import datetime
+
+import pytest
+import whois
+
+from whois_parsing import WhoisParsePool, parse_whois
+from whois_parsing.templates import find_template
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'whois')
+
+
+def load_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES, name + '.txt'), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize('domain, template, expected', [
+    ('example.com', 'generic', {
+        'domain_name': 'example.com',
+        'expiration_date': datetime(2025, 8, 13, 4, 0),
+        'registrar': 'RESERVED-Internet Assigned Numbers Authority',
+        'creation_date': datetime(1995, 8, 14, 4, 0),
+        'name_servers': ['a.iana-servers.net', 'b.iana-servers.net'],
+    }),
+    # 注册局与注册商两部分拼接，注册商部分有空字段
+    ('example.net', 'generic', {
+        'domain_name': 'example.net',
+        'expiration_date': datetime(2027, 5, 21, 16, 32, 10),
+        'registrar': 'Example Registrar, LLC',
+        'creation_date': datetime(2003, 5, 21, 16, 32, 10),
+        'name_servers': ['ns1.example.net', 'ns2.example.net'],
+    }),
+    ('example.co.uk', 'nominet', {
+        'domain_name': 'example.co.uk',
+        'expiration_date': datetime(2026, 8, 26),
+        'registrar': 'Nominet UK',
+        'creation_date': datetime(1996, 8, 26),
+        'name_servers': ['ns1.example.net', 'ns2.example.net'],
+    }),
+    ('yandex.ru', 'ru-center', {
+        'domain_name': 'yandex.ru',
+        'expiration_date': datetime(2026, 9, 30, 21, 0),
+        'registrar': 'RU-CENTER-RU',
+        'creation_date': datetime(1997, 9, 23, 9, 45, 7),
+        'name_servers': ['ns1.yandex.ru', 'ns2.yandex.ru'],
+    }),
+    ('example.jp', 'jprs', {
+        'domain_name': 'example.jp',
+        'expiration_date': datetime(2026, 2, 28),
+        'registrar': None,
+        'creation_date': datetime(2001, 2, 3),
+        'name_servers': ['ns1.example.jp', 'ns2.example.jp'],
+    }),
+    ('example.fr', 'afnic', {
+        'domain_name': 'example.fr',
+        'expiration_date': datetime(2026, 3, 5, 10, 49, 44),
+        'registrar': 'GANDI',
+        'creation_date': datetime(2004, 2, 11, 10, 49, 44),
+        'name_servers': ['ns1.example.fr', 'ns2.example.fr'],
+    }),
+])
+def test_parse_registry_responses(domain, template, expected):
+    assert find_template(domain).name == template
+    assert parse_whois(domain, load_fixture(domain)) == expected
+
+
+def test_unicode_domain_uses_idna_template():
+    assert find_template('пример.рф').name == 'ru-center'
+    assert find_template('xn--e1afmkfd.xn--p1ai').name == 'ru-center'
+    assert WhoisParsePool.cache_key('пример.рф', 'x') == WhoisParsePool.cache_key('xn--e1afmkfd.xn--p1ai', 'x')
+
+
+def test_iso_dates_are_not_parsed_day_first():
+    text = 'domain: example.fr\nExpiry Date: 2026-03-05T10:49:44Z\ncreated: 2004-02-11\n'
+    result = parse_whois('example.fr', text)
+    assert result['expiration_date'] == datetime(2026, 3, 5, 10, 49, 44)
+    assert result['creation_date'] == datetime(2004, 2, 11)
+
+
+@pytest.mark.parametrize('domain, text', [
+    ('example.com', 'Domain Name: EXAMPLE.COM\nRegistry Expiry Date: 2025-08-13T04:00:00Z\nRegistrar:\nCreation Date: 1995-08-14T04:00:00Z\n'),
+    ('yandex.ru', 'domain: YANDEX.RU\nregistrar:\ncreated: 1997-09-23T09:45:07Z\npaid-till: 2026-09-30T21:00:00Z\n'),
+    ('example.fr', 'domain: example.fr\nregistrar:\nExpiry Date: 2026-03-05T10:49:44Z\n'),
+])
+def test_empty_field_does_not_capture_next_line(domain, text):
+    assert parse_whois(domain, text)['registrar'] is None
+
+
+def test_not_found_raises():
+    with pytest.raises(whois.parser.PywhoisError, match='No match for domain'):
+        parse_whois('nope.com', 'No match for "NOPE.COM".\n>>> Last update of whois database: 2024-10-19T05:12:48Z <<<\n')
+
+
+def test_empty_response_returns_none():
+    assert parse_whois('example.com', '') is None
+
+
+@pytest.mark.parametrize('domain', ['example.com', 'example.co.uk', 'yandex.ru'])
+def test_cache_key_ignores_query_timestamps(domain):
+    text = load_fixture(domain)
+    requeried = (text.replace('2024-10-19T05:12:48Z', '2024-10-20T08:00:00Z')
+                 .replace('05:12:48 19-Oct-2024', '08:00:00 20-Oct-2024')
+                 .replace('2024-10-19T05:11:31Z', '2024-10-20T08:00:00Z'))
+    assert requeried != text
+    assert WhoisParsePool.cache_key(domain, requeried) == WhoisParsePool.cache_key(domain, text)
+
+
+def test_cache_key_changes_with_record():
+    text = load_fixture('example.com')
+    renewed = text.replace('Registry Expiry Date: 2025-08-13', 'Registry Expiry Date: 2026-08-13')
+    assert WhoisParsePool.cache_key('example.com', renewed) != WhoisParsePool.cache_key('example.com', text)
+
+
+def test_identical_response_is_served_from_cache():
+    pool = WhoisParsePool({'whois': {'parse_workers': 0, 'parse_cache_file': None}})
+    text = load_fixture('example.com')
+    first = pool.parse('example.com', text)
+    first['name_servers'].append('mutated')
+    assert pool.parse('example.com', text.replace('2024-10-19T05:12:48Z', '2024-10-20T08:00:00Z')) == parse_whois('example.com', text)
+    assert len(pool._cache) == 1
+
+
+def test_unicode_domain_matches_idna_response(tmp_path, monkeypatch):
+    import app
+
+    config_file = tmp_path / 'config.json'
+    config_file.write_text('{"accounts": [{"name": "SK", "api_key": "key", "api_secret": "secret"}], '
+                           '"whois": {"parse_workers": 0, "parse_cache_file": null}}')
+    monitor = app.DomainMonitor(str(config_file))
+    text = load_fixture('yandex.ru').replace('YANDEX.RU', 'XN--E1AFMKFD.XN--P1AI')
+    fetched = []
+    monkeypatch.setattr(monitor, '_fetch_whois', lambda domain: fetched.append(domain) or text)
+
+    result = monitor.check_domain_without_auth('пример.рф')
+    assert result['expiry_date'] == datetime(2026, 9, 30, 21, 0)
+    # 域名一致，不应重试
+    assert fetched == ['пример.рф']
+
+
+def test_broken_process_pool_is_recreated():
+    pool = WhoisParsePool({'whois': {'parse_workers': 1, 'parse_cache_file': None}})
+    text = load_fixture('example.com')
+    try:
+        assert pool.parse('example.com', text)['domain_name'] == 'example.com'
+        broken = pool._executor
+        # 模拟子进程被终止，进程池进入 broken 状态
+        for process in list(broken._processes.values()):
+            process.kill()
+            process.join()
+        assert pool.parse('example.net', load_fixture('example.net'))['domain_name'] == 'example.net'
+        assert pool._executor is not broken
+    finally:
+        pool.close()
+
+
+def test_cache_is_persisted_across_runs(tmp_path, monkeypatch):
+    config = {'whois': {'parse_workers': 0, 'parse_cache_file': str(tmp_path / 'cache.json')}}
+    pool = WhoisParsePool(config)
+    expected = pool.parse('example.com', load_fixture('example.com'))
+    pool.close()
+
+    # 重新启动后命中缓存，不再解析，datetime 字段从ISO字符串还原
+    monkeypatch.setattr('whois_parsing.pool.parse_whois', lambda domain, text: pytest.fail('parsed again'))
+    restarted = WhoisParsePool(config)
+    assert restarted.parse('example.com', load_fixture('example.com')) == expected
+    assert isinstance(expected['expiration_date'], datetime)
+
+
+@pytest.mark.parametrize('content', ['not json', '{"version": 0, "entries": [["key", {}]]}'])
+def test_unreadable_cache_file_is_ignored(tmp_path, content):
+    cache_file = tmp_path / 'cache.json'
+    cache_file.write_text(content)
+    pool = WhoisParsePool({'whois': {'parse_workers': 0, 'parse_cache_file': str(cache_file)}})
+    assert len(pool._cache) == 0
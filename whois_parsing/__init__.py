@@ -0,0 +1,4 @@
+from .parser import parse_whois
+from .pool import WhoisParsePool
+
+__all__ = ['parse_whois', 'WhoisParsePool']
@@ -0,0 +1,133 @@
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+import whois
+from dateutil.parser import parse
+
+from .templates import RegistryTemplate, find_template
+
+
+def _parse_date(value: Any) -> Optional[datetime]:
+    """将WHOIS中的日期转换为不带时区的datetime"""
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None)
+    value = str(value)
+    # 大多数注册局返回ISO 8601日期，优先严格解析，避免 dateutil 猜测日月顺序
+    try:
+        return datetime.fromisoformat(value).replace(tzinfo=None)
+    except ValueError:
+        pass
+    try:
+        return parse(value).replace(tzinfo=None)
+    except (ValueError, OverflowError):
+        return None
+
+
+def _earliest_date(values: Any) -> Optional[datetime]:
+    """从单个值或列表中取最早的有效日期"""
+    if not isinstance(values, list):
+        values = [values]
+    dates = [_parse_date(v) for v in values if v is not None]
+    dates = [d for d in dates if d is not None]
+    return min(dates) if dates else None
+
+
+def _name_servers(values: List[str]) -> List[str]:
+    """整理名称服务器列表（兼容单行和多行块两种格式）"""
+    nameservers = []
+    for value in values:
+        for line in value.splitlines():
+            parts = line.split()
+            if parts:
+                ns = parts[0].rstrip('.').lower()
+                if ns not in nameservers:
+                    nameservers.append(ns)
+    return nameservers
+
+
+def _from_template(template: RegistryTemplate, text: str) -> Dict[str, Any]:
+    """使用注册局模板提取字段"""
+    fields = template.extract(text)
+    domain_names = fields.get('domain_name', [])
+    registrars = fields.get('registrar', [])
+    return {
+        'domain_name': domain_names[0].lower() if domain_names else None,
+        'expiration_date': _earliest_date(fields.get('expiration_date', [])),
+        'registrar': registrars[-1] if registrars else None,
+        'creation_date': _earliest_date(fields.get('creation_date', [])),
+        'name_servers': _name_servers(fields.get('name_servers', [])),
+    }
+
+
+def _from_whois_entry(w: whois.WhoisEntry) -> Dict[str, Any]:
+    """从 python-whois 的解析结果中提取字段，带多级回退"""
+    # Handle domain name
+    domain_name = None
+    if isinstance(w.domain_name, list):
+        domain_name = next((d.lower() for d in w.domain_name if d), None)
+    elif w.domain_name:
+        domain_name = w.domain_name.lower()
+
+    # Handle expiration date with fallbacks
+    expiry_date = None
+    try:
+        expiry_date = _earliest_date(w.expiration_date) if w.expiration_date else None
+    except Exception:
+        pass
+    if not expiry_date and w.registry_expiry_date:
+        expiry_date = _parse_date(w.registry_expiry_date)
+
+    # Handle registrar with fallbacks
+    registrar = None
+    if isinstance(w.registrar, list):
+        registrar = next((r for r in w.registrar if r), None)
+    else:
+        registrar = w.registrar
+    if not registrar and w.registrant:
+        registrar = w.registrant
+
+    # Process creation date
+    creation_date = None
+    try:
+        creation_date = _earliest_date(w.creation_date) if w.creation_date else None
+    except Exception:
+        pass
+
+    # Get nameservers
+    nameservers = []
+    if isinstance(w.name_servers, list):
+        nameservers = [ns.lower() for ns in w.name_servers if ns and isinstance(ns, str)]
+    elif isinstance(w.name_servers, str):
+        nameservers = [w.name_servers.lower()]
+
+    return {
+        'domain_name': domain_name,
+        'expiration_date': expiry_date,
+        'registrar': registrar,
+        'creation_date': creation_date,
+        'name_servers': nameservers,
+    }
+
+
+def parse_whois(domain: str, text: str) -> Optional[Dict[str, Any]]:
+    """解析原始WHOIS文本，在进程池的子进程中运行
+
+    优先使用注册局模板；模板无法识别到期时间时回退到 python-whois 的解析器。
+    域名不存在时抛出 whois.parser.PywhoisError，没有任何数据时返回None。
+    """
+    if not text or not text.strip():
+        return None
+
+    template = find_template(domain)
+    if template.is_not_found(text):
+        raise whois.parser.PywhoisError(f"No match for domain {domain}")
+
+    result = _from_template(template, text)
+    if result['expiration_date'] is None:
+        fallback = _from_whois_entry(whois.WhoisEntry.load(domain, text))
+        # 保留模板已经识别出的字段
+        result = {key: result[key] or fallback[key] for key in result}
+
+    if not result['domain_name'] and not result['expiration_date']:
+        return None
+    return result
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+from .parser import parse_whois
+from .templates import ascii_domain
+
+
+# 每次查询都会变化、与记录内容无关的行（数据库更新时间、查询时间），计算缓存键前去除
+VOLATILE_LINES = re.compile(
+    r'^(?:'
+    r'\s*>>>\s*Last update of whois database:.*'
+    r'|\s*Last updated on .*'
+    r'|\s*WHOIS lookup made at .*'
+    r'|\s*%*\s*Query time.*'
+    r'|\s*Timestamp:.*'
+    r')$\n?',
+    re.IGNORECASE | re.MULTILINE,
+)
+
+
+# 缓存文件格式版本，解析模板或解析结果的结构变化时递增，旧缓存会被忽略
+CACHE_VERSION = 1
+DATE_FIELDS = ('expiration_date', 'creation_date')
+
+
+class WhoisParsePool:
+    """在进程池中解析WHOIS原始文本，并按原始文本哈希缓存解析结果"""
+
+    def __init__(self, config: Dict[str, Any]):
+        self.config = config.get('whois', {})
+        # 0 表示在当前进程中解析
+        self.workers = self.config.get('parse_workers', os.cpu_count() or 1)
+        self.cache_size = self.config.get('parse_cache_size', 10000)
+        # 缓存保存在快照旁边，跨运行复用；为空时只在内存中缓存
+        self.cache_file = self.config.get('parse_cache_file', 'data/whois_parse_cache.json')
+        self._executor = None
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_cache()
+
+    @staticmethod
+    def cache_key(domain: str, text: str) -> str:
+        """原始文本的哈希（解析模板由域名后缀决定，因此域名也参与计算）
+
+        计算前去除时间戳等易变行，同一条记录的重复查询才能命中缓存。
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(ascii_domain(domain).encode('ascii'))
+        digest.update(b'\0')
+        digest.update(VOLATILE_LINES.sub('', text).encode('utf-8', 'surrogatepass'))
+        return digest.hexdigest()
+
+    def parse(self, domain: str, text: str) -> Optional[Dict[str, Any]]:
+        """解析WHOIS文本，相同的原始文本直接返回缓存结果"""
+        key = self.cache_key(domain, text)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._copy(self._cache[key])
+
+        if self.workers:
+            executor = self._get_executor()
+            try:
+                result = executor.submit(parse_whois, domain, text).result()
+            except BrokenProcessPool:
+                # 子进程异常退出（如被 OOM 终止）后进程池不可再用，重建后重试一次
+                self._discard_executor(executor)
+                result = self._get_executor().submit(parse_whois, domain, text).result()
+        else:
+            result = parse_whois(domain, text)
+
+        if result is not None and self.cache_size:
+            with self._lock:
+                self._cache[key] = result
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return self._copy(result)
+
+    def close(self) -> None:
+        """关闭进程池并保存缓存，之后再次解析时会重新创建进程池"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown()
+        self.save_cache()
+
+    def save_cache(self) -> None:
+        """将缓存写入文件（按最近使用顺序，datetime 保存为ISO字符串）"""
+        if not self.cache_file or not self.cache_size:
+            return
+        with self._lock:
+            entries = [
+                [key, {k: v.isoformat() if k in DATE_FIELDS and v else v for k, v in result.items()}]
+                for key, result in self._cache.items()
+            ]
+        directory = os.path.dirname(self.cache_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.cache_file + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'version': CACHE_VERSION, 'entries': entries},
+                               ensure_ascii=False, separators=(',', ':')))
+        os.replace(tmp_path, self.cache_file)
+
+    def _load_cache(self) -> None:
+        """读取上次运行保存的缓存，文件不存在、损坏或版本不符时从空缓存开始"""
+        if not self.cache_file or not self.cache_size or not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != CACHE_VERSION:
+                return
+            for key, result in data['entries'][-self.cache_size:]:
+                for field in DATE_FIELDS:
+                    if result.get(field):
+                        result[field] = datetime.fromisoformat(result[field])
+                self._cache[key] = result
+        except (OSError, ValueError, KeyError, TypeError):
+            self._cache.clear()
+
+    def _discard_executor(self, executor: ProcessPoolExecutor) -> None:
+        """丢弃已损坏的进程池，其他线程可能已经重建，因此只在仍是同一个进程池时置空"""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # 进程池在抓取线程中按需创建，从多线程进程 fork 可能因锁状态死锁，因此使用 spawn
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                )
+            return self._executor
+
+    @staticmethod
+    def _copy(result: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        # 缓存中的结果可能被多个调用方共享，返回副本避免被修改
+        if result is None:
+            return None
+        return dict(result, name_servers=list(result['name_servers']))
@@ -0,0 +1,136 @@
+import re
+from typing import Dict, List, Pattern, Sequence
+
+FLAGS = re.IGNORECASE | re.MULTILINE
+
+
+def _compile(patterns: Sequence[str]) -> List[Pattern]:
+    return [re.compile(pattern, FLAGS) for pattern in patterns]
+
+
+class RegistryTemplate:
+    """单个注册局WHOIS输出格式的解析模板，正则在导入时预编译
+
+    单行字段的值只匹配空格和制表符后的非空内容：MULTILINE 模式下 \\s* 会跨越换行，
+    空字段会误把下一行当作值。
+    """
+
+    def __init__(self, name: str, suffixes: Sequence[str], fields: Dict[str, Sequence[str]],
+                 not_found: Sequence[str] = ()):
+        self.name = name
+        self.suffixes = tuple(suffixes)
+        self.patterns = {field: _compile(patterns) for field, patterns in fields.items()}
+        self.not_found = _compile(not_found)
+
+    def matches(self, domain: str) -> bool:
+        """判断域名是否属于该注册局"""
+        return domain.lower().endswith(self.suffixes)
+
+    def is_not_found(self, text: str) -> bool:
+        """判断WHOIS输出是否表示域名不存在"""
+        return any(pattern.search(text) for pattern in self.not_found)
+
+    def extract(self, text: str) -> Dict[str, List[str]]:
+        """按字段提取原始字符串，每个字段使用第一个有匹配的正则"""
+        result = {}
+        for field, patterns in self.patterns.items():
+            for pattern in patterns:
+                values = [value.strip() for value in pattern.findall(text) if value.strip()]
+                if values:
+                    result[field] = values
+                    break
+        return result
+
+
+# ICANN 通用格式（gTLD 及大部分使用 RDDS 格式的 ccTLD），作为默认模板
+GENERIC = RegistryTemplate(
+    'generic',
+    suffixes=(),
+    fields={
+        'domain_name': [r'^\s*Domain Name:[ \t]*(\S.*)$', r'^\s*domain:[ \t]*(\S.*)$'],
+        'expiration_date': [
+            r'^\s*Registry Expiry Date:[ \t]*(\S.*)$',
+            r'^\s*Registrar Registration Expiration Date:[ \t]*(\S.*)$',
+            r'^\s*Expir\w* Date:[ \t]*(\S.*)$',
+            r'^\s*paid-till:[ \t]*(\S.*)$',
+        ],
+        'registrar': [r'^\s*Registrar:[ \t]*(\S.*)$', r'^\s*Sponsoring Registrar:[ \t]*(\S.*)$'],
+        'creation_date': [r'^\s*Creation Date:[ \t]*(\S.*)$', r'^\s*Created(?: On)?:[ \t]*(\S.*)$'],
+        'name_servers': [r'^\s*Name Server:[ \t]*(\S.*)$', r'^\s*nserver:[ \t]*(\S.*)$'],
+    },
+    not_found=[r'^\s*No match for ', r'^\s*NOT FOUND\s*$', r'^\s*Domain not found\.?\s*$'],
+)
+
+# Nominet (.uk)，字段值位于字段名的下一行
+NOMINET = RegistryTemplate(
+    'nominet',
+    suffixes=('.uk',),
+    fields={
+        'domain_name': [r'^\s*Domain name:\s*\n\s*(.+)$'],
+        'expiration_date': [r'^\s*Expiry date:[ \t]*(\S.*)$'],
+        'registrar': [r'^\s*Registrar:\s*\n\s*(.+?)(?:\s*\[Tag = .*\])?$'],
+        'creation_date': [r'^\s*Registered on:[ \t]*(\S.*)$'],
+        'name_servers': [r'^\s*Name servers:\s*\n((?:[ \t]+\S.*\n?)+)'],
+    },
+    not_found=[r'This domain name has not been registered', r'^\s*No match for '],
+)
+
+# RU-CENTER (.ru / .su / .рф)
+RU_CENTER = RegistryTemplate(
+    'ru-center',
+    suffixes=('.ru', '.su', '.xn--p1ai'),
+    fields={
+        'domain_name': [r'^\s*domain:[ \t]*(\S.*)$'],
+        'expiration_date': [r'^\s*paid-till:[ \t]*(\S.*)$'],
+        'registrar': [r'^\s*registrar:[ \t]*(\S.*)$'],
+        'creation_date': [r'^\s*created:[ \t]*(\S.*)$'],
+        'name_servers': [r'^\s*nserver:[ \t]*(\S.*)$'],
+    },
+    not_found=[r'^\s*No entries found'],
+)
+
+# JPRS (.jp)，同时兼容英文和日文输出
+JPRS = RegistryTemplate(
+    'jprs',
+    suffixes=('.jp',),
+    fields={
+        'domain_name': [r'^\s*(?:[a-z]\.\s*)?\[(?:Domain Name|ドメイン名)\][ \t]*(\S.*)$'],
+        'expiration_date': [
+            r'^\s*\[(?:Expires on|有効期限)\][ \t]*(\S+)',
+            r'^\s*\[(?:State|状態)\][ \t]*Connected[ \t]*\((\S+?)\)',
+        ],
+        'creation_date': [r'^\s*(?:[a-z]\.\s*)?\[(?:Registered Date|Created on|登録年月日|作成年月日)\][ \t]*(\S+)'],
+        'name_servers': [r'^\s*(?:[a-z]\.\s*)?\[(?:Name Server|ネームサーバ)\][ \t]*(\S.*)$'],
+    },
+    not_found=[r'^\s*No match!!'],
+)
+
+# AFNIC (.fr 及其管理的海外领地后缀)
+AFNIC = RegistryTemplate(
+    'afnic',
+    suffixes=('.fr', '.re', '.pm', '.tf', '.wf', '.yt'),
+    fields={
+        'domain_name': [r'^\s*domain:[ \t]*(\S.*)$'],
+        'expiration_date': [r'^\s*Expiry Date:[ \t]*(\S.*)$'],
+        'registrar': [r'^\s*registrar:[ \t]*(\S.*)$'],
+        'creation_date': [r'^\s*created:[ \t]*(\S.*)$'],
+        'name_servers': [r'^\s*nserver:[ \t]*(\S.*)$'],
+    },
+    not_found=[r'^\s*%+\s*No entries found', r'^\s*No entries found'],
+)
+
+TEMPLATES = [NOMINET, RU_CENTER, JPRS, AFNIC]
+
+
+def ascii_domain(domain: str) -> str:
+    """将域名转换为IDNA编码的小写ASCII形式（如 пример.рф -> xn--e1afmkfd.xn--p1ai）"""
+    try:
+        return domain.lower().encode('idna').decode('ascii')
+    except UnicodeError:
+        return domain.lower()
+
+
+def find_template(domain: str) -> RegistryTemplate:
+    """根据域名后缀选择模板，没有匹配时使用通用模板"""
+    domain = ascii_domain(domain)
+    return next((template for template in TEMPLATES if template.matches(domain)), GENERIC)